@@ -1,57 +1,313 @@
+import argparse
+import asyncio
+import datetime
 import json
+import re
+import sys
 from pathlib import Path
 from telethon import TelegramClient, events
+from telethon.tl.types import ForumTopic
+
+try:
+    # Telethon >= 1.42 (layer baru): messages.getForumTopics(peer=...)
+    from telethon.tl.functions.messages import GetForumTopicsRequest
+    FORUM_TOPICS_PEER_ARG = "peer"
+except ImportError:
+    from telethon.tl.functions.channels import GetForumTopicsRequest
+    FORUM_TOPICS_PEER_ARG = "channel"
 
 API_ID = 39140065
 API_HASH = '929779a46119c86a7f74f7c4c6ddabd3'
+SESSION_NAME = "akun_rozi_rizky"
 
-client = TelegramClient("akun_rozi_rizky", API_ID, API_HASH)
-SOURCE_CHANNEL = None  # tidak tahu di awal
 SOURCE_CHANNEL_FILE = Path("source_channel.json")
 GROUP_LIST_FILE = Path("group_list.json")
+CHAT_INDEX_FILE = Path("chat_index.json")
+
+INDEX_SAVE_EVERY = 50  # simpan index tiap N dialog, biar scan yang terputus tidak hilang
+TOPIC_PAGE_SIZE = 100
+# Pesan di topic General tidak punya reply header, jadi tidak bisa difilter lewat source_topic_id
+GENERAL_TOPIC_ID = 1
+
+
+# ---------------------------------------------------------
+# CHAT INDEX (persisted)
+# ---------------------------------------------------------
+def load_chat_index():
+    if CHAT_INDEX_FILE.exists():
+        try:
+            data = json.loads(CHAT_INDEX_FILE.read_text())
+        except json.JSONDecodeError:
+            data = None
+        if isinstance(data, dict) and isinstance(data.get("chats"), dict):
+            return data
+    return {"complete": False, "updated_at": None, "chats": {}}
+
+
+def save_chat_index(index):
+    index["updated_at"] = datetime.datetime.now().astimezone().isoformat()
+    CHAT_INDEX_FILE.write_text(json.dumps(index, indent=2, ensure_ascii=False))
+
+
+def dialog_kind(dialog):
+    entity = dialog.entity
+    if dialog.is_channel:
+        return "megagroup" if getattr(entity, "megagroup", False) else "channel"
+    if dialog.is_group:
+        return "group"
+    return None
+
+
+def dialog_top_message(dialog):
+    return dialog.message.id if dialog.message else 0
+
 
-async def export_group_list():
-    groups = []
+async def fetch_forum_topics(client, entity):
+    """Return {topic_id: title} for every topic of a forum supergroup."""
+    topics = {}
+    offset_date, offset_id, offset_topic = None, 0, 0
+
+    while True:
+        result = await client(GetForumTopicsRequest(
+            **{FORUM_TOPICS_PEER_ARG: entity},
+            offset_date=offset_date,
+            offset_id=offset_id,
+            offset_topic=offset_topic,
+            limit=TOPIC_PAGE_SIZE
+        ))
+        page = [topic for topic in result.topics if isinstance(topic, ForumTopic)]
+        for topic in page:
+            topics[str(topic.id)] = topic.title
+
+        if not result.topics or len(topics) >= result.count or not page:
+            return topics
+
+        last = page[-1]
+        offset_date, offset_id, offset_topic = last.date, last.top_message, last.id
+
+
+def print_chat(chat_id, entry, status):
+    forum = " [forum]" if entry["is_forum"] else ""
+    print(f"{status} {chat_id} ({entry['kind']}{forum}) {entry['name']}")
+    for topic_id, title in entry["topics"].items():
+        print(f"      └─ topic {topic_id}: {title}")
+
+
+async def refresh_chat_index(client, index, full=False):
+    """Scan dialogs newest-first, refreshing only chats whose top message changed.
+
+    Dialogs are ordered by last activity, so after a complete previous scan the
+    first unchanged non-pinned dialog means every older one is unchanged too.
+    """
+    chats = index["chats"]
+    incremental = index.get("complete") and not full
+    seen = set()
+    refreshed = 0
+
+    index["complete"] = False
     async for dialog in client.iter_dialogs():
-        entity = dialog.entity
-        is_group = dialog.is_group
-        is_megagroup = dialog.is_channel and getattr(entity, "megagroup", False)
+        kind = dialog_kind(dialog)
+        if kind is None:
+            continue
+
+        chat_id = str(dialog.id)
+        seen.add(chat_id)
+        top_message = dialog_top_message(dialog)
+        cached = chats.get(chat_id)
 
-        if not (is_group or is_megagroup):
+        if cached and cached["top_message"] == top_message:
+            if incremental and not dialog.pinned:
+                break
             continue
 
-        groups.append({
+        is_forum = bool(getattr(dialog.entity, "forum", False))
+        topics = {}
+        if is_forum:
+            try:
+                topics = await fetch_forum_topics(client, dialog.input_entity)
+            except Exception as e:
+                print(f"⚠️ Gagal ambil topic {chat_id}: {e}")
+                topics = cached["topics"] if cached else {}
+
+        entry = {
             "name": dialog.name,
-            "chat_id": dialog.id
-        })
+            "kind": kind,
+            "is_forum": is_forum,
+            "top_message": top_message,
+            "topics": topics
+        }
+        chats[chat_id] = entry
+        refreshed += 1
+        print_chat(chat_id, entry, "🆕" if not cached else "🔄")
+
+        if refreshed % INDEX_SAVE_EVERY == 0:
+            save_chat_index(index)
+    else:
+        # scan penuh sampai habis: buang chat yang sudah tidak ada di dialog
+        for chat_id in [chat_id for chat_id in chats if chat_id not in seen]:
+            print(f"🗑️ {chat_id} {chats.pop(chat_id)['name']}")
+
+    index["complete"] = True
+    save_chat_index(index)
+    print(f"📝 Index: {refreshed} chat diperbarui, total {len(chats)} di {CHAT_INDEX_FILE.name}")
 
+
+def export_group_list(index):
+    groups = [
+        {"name": entry["name"], "chat_id": int(chat_id)}
+        for chat_id, entry in index["chats"].items()
+        if entry["kind"] in ("group", "megagroup")
+    ]
     GROUP_LIST_FILE.write_text(json.dumps(groups, indent=2))
     print(f"📝 Saved {len(groups)} groups to {GROUP_LIST_FILE.name}")
 
-@client.on(events.NewMessage())
-async def detect_handler(event):
-    global SOURCE_CHANNEL
 
-    msg = event.message
-    chat_id = msg.chat_id
+# ---------------------------------------------------------
+# RECEIVERS.JSON ENTRIES
+# ---------------------------------------------------------
+def select_chats(index, match=None, chat_ids=None):
+    pattern = re.compile(re.escape(match), re.IGNORECASE) if match else None
+    wanted_ids = {str(chat_id) for chat_id in chat_ids or []}
+    for chat_id, entry in index["chats"].items():
+        if wanted_ids and chat_id not in wanted_ids:
+            continue
+        if pattern and not pattern.search(entry["name"] or ""):
+            continue
+        yield chat_id, entry
+
+
+def receiver_name(chat_name, chat_id, topic_id=None):
+    """Filename-safe, unique receiver name: slug of the title plus chat/topic id."""
+    slug = re.sub(r"[^a-z0-9]+", "-", (chat_name or "").lower()).strip("-")[:40] or "chat"
+    name = f"{slug}_{abs(int(chat_id))}"
+    if topic_id is not None:
+        name += f"_t{topic_id}"
+    return name
+
+
+def build_receiver_entries(index, session_name, api_id, api_hash, match=None, chat_ids=None):
+    """Build receivers.json entries; forums get one entry per topic (General is skipped)."""
+    entries = []
+    for chat_id, entry in select_chats(index, match, chat_ids):
+        base = {
+            "session": session_name,
+            "api_id": api_id,
+            "api_hash": api_hash,
+            "source_channel": int(chat_id),
+            "source_topic_id": None,
+            "target_topic_id": None,
+            "start_date": None
+        }
+        if entry["is_forum"] and entry["topics"]:
+            for topic_id, title in entry["topics"].items():
+                if int(topic_id) == GENERAL_TOPIC_ID:
+                    continue
+                entries.append({
+                    "name": receiver_name(f"{entry['name']} {title}", chat_id, topic_id),
+                    **base,
+                    "source_topic_id": int(topic_id)
+                })
+        else:
+            entries.append({"name": receiver_name(entry["name"], chat_id), **base})
+    return entries
+
+
+# ---------------------------------------------------------
+# LIVE DETECTION
+# ---------------------------------------------------------
+def register_detect_handler(client):
+    state = {"source_channel": None}
+
+    @client.on(events.NewMessage())
+    async def detect_handler(event):
+        msg = event.message
+        chat_id = msg.chat_id
+
+        # kalau pesan dari PM, bot, atau channel yang tidak ingin kamu gunakan → skip
+        if chat_id > 0:
+            return
+
+        if state["source_channel"] is None:
+            state["source_channel"] = chat_id
+            print("🎯 Detected SOURCE_CHANNEL:", chat_id)
+
+            # simpan ke file biar permanen
+            SOURCE_CHANNEL_FILE.write_text(str(chat_id))
+
+        header = getattr(msg, "reply_to", None)
+        topic_id = getattr(header, "reply_to_top_id", None) or getattr(header, "reply_to_msg_id", None)
+        print(f"📩 New message from {chat_id} (topic {topic_id}): {msg.text}")
+
+
+async def run(args):
+    index = load_chat_index()
+
+    if args.offline:
+        client = None
+    else:
+        client = TelegramClient(args.session, args.api_id, args.api_hash)
+        await client.start()
+        await refresh_chat_index(client, index, full=args.full)
+        export_group_list(index)
+
+    if args.emit_receivers:
+        entries = build_receiver_entries(
+            index, args.session, args.api_id, args.api_hash,
+            match=args.match, chat_ids=args.chat
+        )
+        output = json.dumps(entries, indent=2, ensure_ascii=False)
+        if args.emit_receivers == "-":
+            print(output)
+            # hint ke stderr supaya output stdout tetap JSON valid
+            print(f"📝 {len(entries)} receiver entries (isi target_topic_id dulu)", file=sys.stderr)
+        else:
+            Path(args.emit_receivers).write_text(output)
+            print(f"📝 Saved {len(entries)} receiver entries to {args.emit_receivers} (isi target_topic_id dulu)")
+
+    if client is None:
+        return
 
-    # kalau pesan dari PM, bot, atau channel yang tidak ingin kamu gunakan → skip
-    if chat_id > 0:
-        return  
+    try:
+        if args.listen:
+            register_detect_handler(client)
+            print("✅ Index updated. Listening for new messages...")
+            await client.run_until_disconnected()
+    finally:
+        await client.disconnect()
 
-    if SOURCE_CHANNEL is None:
-        SOURCE_CHANNEL = chat_id
-        print("🎯 Detected SOURCE_CHANNEL:", SOURCE_CHANNEL)
 
-        # simpan ke file biar permanen
-        SOURCE_CHANNEL_FILE.write_text(str(SOURCE_CHANNEL))
+def main():
+    parser = argparse.ArgumentParser(
+        description="Index chat/topic (incremental) dan buat entry receivers.json."
+    )
+    parser.add_argument("--session", default=SESSION_NAME, help="Nama file session Telethon.")
+    parser.add_argument("--api-id", type=int, default=API_ID)
+    parser.add_argument("--api-hash", default=API_HASH)
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Scan ulang semua dialog (juga membuang chat yang sudah ditinggalkan)."
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="Jangan konek ke Telegram, pakai chat_index.json yang sudah ada."
+    )
+    parser.add_argument(
+        "--emit-receivers", metavar="FILE",
+        help="Tulis entry receivers.json untuk chat terpilih ke FILE ('-' untuk stdout)."
+    )
+    parser.add_argument("--match", help="Filter nama chat (case-insensitive) untuk --emit-receivers.")
+    parser.add_argument(
+        "--chat", type=int, action="append",
+        help="Chat ID untuk --emit-receivers (boleh diulang)."
+    )
+    parser.add_argument(
+        "--listen", action="store_true",
+        help="Setelah index, tetap jalan dan print chat_id/topic dari pesan baru."
+    )
+    args = parser.parse_args()
 
-    print(f"📩 New message from {chat_id}: {msg.text}")
+    asyncio.run(run(args))
 
-async def main():
-    await client.start()
-    await export_group_list()
-    print("✅ Group list exported. Listening for new messages...")
-    await client.run_until_disconnected()
 
-client.loop.run_until_complete(main())
+if __name__ == "__main__":
+    main()
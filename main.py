@@ -1,18 +1,56 @@
 import json
 import os
+import sys
 import asyncio
+import atexit
+import logging
+import logging.handlers
+import queue
 import datetime
 import base64
+import copy
+import hashlib
+import random
+import re
+import struct
+import time
+from collections import OrderedDict
 from pathlib import Path
-from telethon import TelegramClient, events
-from telethon.errors import FloodWaitError
+from telethon import TelegramClient, events, utils
+from telethon.errors import FloodWaitError, RPCError
+from telethon.extensions import BinaryReader, markdown
+from telethon.helpers import add_surrogate, del_surrogate
+from telethon.tl.functions.channels import GetChannelsRequest
+from telethon.tl.functions.messages import GetChatsRequest
+from telethon.tl.functions.upload import SaveBigFilePartRequest
+from telethon.tl.types import (
+    Channel,
+    Chat,
+    InputChannel,
+    InputFileBig,
+    InputMessageEntityMentionName,
+    InputPeerChannel,
+    InputPeerChat,
+    InputPeerUser,
+    MessageEntityBankCard,
+    MessageEntityBotCommand,
+    MessageEntityCashtag,
+    MessageEntityCode,
+    MessageEntityCustomEmoji,
+    MessageEntityEmail,
+    MessageEntityHashtag,
+    MessageEntityMention,
+    MessageEntityMentionName,
+    MessageEntityPhone,
+    MessageEntityTextUrl,
+    MessageEntityUrl,
+)
 
 try:
     import aiohttp
     AIOHTTP_AVAILABLE = True
 except ImportError:
     AIOHTTP_AVAILABLE = False
-    print("⚠️ aiohttp not installed. Webhook feature disabled. Install with: pip install aiohttp")
 
 
 def load_dotenv_file(path: str = ".env"):
@@ -49,8 +87,122 @@ def require_int_env(name: str) -> int:
         raise ValueError(f"Environment variable {name} must be an integer.") from exc
 
 
+def optional_int_env(name: str, default: int) -> int:
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise ValueError(f"Environment variable {name} must be an integer.") from exc
+
+
+def optional_bool_env(name: str, default: bool) -> bool:
+    value = os.getenv(name, "").strip().lower()
+    if not value:
+        return default
+    return value not in ("0", "false", "no", "off")
+
+
 load_dotenv_file()
 
+# ---------------------------------------------------------
+# LOGGING (non-blocking: ditulis oleh thread background)
+# ---------------------------------------------------------
+LOG_LEVEL = os.getenv("LOG_LEVEL", "").strip().upper() or "INFO"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "").strip().lower() or "text"
+LOG_SAMPLE_EVERY = max(optional_int_env("LOG_SAMPLE_EVERY", 1), 1)
+LOG_QUEUE_SIZE = max(optional_int_env("LOG_QUEUE_SIZE", 10000), 1)
+
+# Event bervolume tinggi yang boleh di-sampling; warning/error tidak pernah di-sampling
+SAMPLED_LOG_EVENTS = {"queue", "download", "sent", "media_deleted", "webhook", "progress"}
+
+# Atribut bawaan LogRecord; sisanya (dari extra=) ikut ditulis sebagai field JSON
+LOG_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per line with the record's extra fields (receiver, event, ...)."""
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.datetime.fromtimestamp(record.created).astimezone().isoformat(),
+            "level": record.levelname,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in LOG_RECORD_FIELDS:
+                payload[key] = value
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SampleFilter(logging.Filter):
+    """Keep 1 of every N records per high-volume event."""
+
+    def __init__(self, every):
+        super().__init__()
+        self.every = every
+        self.counters = {}
+
+    def filter(self, record):
+        event = getattr(record, "event", None)
+        if self.every <= 1 or event not in SAMPLED_LOG_EVENTS or record.levelno >= logging.WARNING:
+            return True
+        count = self.counters.get(event, 0)
+        self.counters[event] = count + 1
+        return count % self.every == 0
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never block the event loop: drop records while the log queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            if self.dropped:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": record.name,
+                    "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": f"⚠️ {self.dropped} log dibuang karena queue log penuh",
+                    "event": "log_dropped",
+                }))
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging():
+    logger = logging.getLogger("tele_clone")
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        stream_handler.setFormatter(JsonLineFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(SampleFilter(LOG_SAMPLE_EVERY))
+    logger.addHandler(queue_handler)
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return logger
+
+
+log = setup_logging()
+
+if not AIOHTTP_AVAILABLE:
+    log.warning("⚠️ aiohttp not installed. Webhook feature disabled. Install with: pip install aiohttp")
+
 # ---------------------------------------------------------
 # CONFIG SESSION
 # ---------------------------------------------------------
@@ -67,16 +219,50 @@ WEBHOOK_AUTH_PASSWORD = os.getenv("WEBHOOK_AUTH_PASSWORD", "").strip()
 WEBHOOK_ENABLED = bool(WEBHOOK_URL) and AIOHTTP_AVAILABLE
 
 if WEBHOOK_URL and not AIOHTTP_AVAILABLE:
-    print("⚠️ WEBHOOK_URL is set but aiohttp is not installed. Webhook disabled.")
+    log.warning("⚠️ WEBHOOK_URL is set but aiohttp is not installed. Webhook disabled.")
 elif WEBHOOK_ENABLED:
-    print(f"✅ Webhook enabled: {WEBHOOK_URL[:50]}...")
+    log.info(f"✅ Webhook enabled: {WEBHOOK_URL[:50]}...")
+
+# Fast transfer config (parallel multi-part download/upload for large media)
+FAST_TRANSFER_ENABLED = optional_bool_env("FAST_TRANSFER_ENABLED", True)
+FAST_TRANSFER_WORKERS = max(optional_int_env("FAST_TRANSFER_WORKERS", 4), 1)
+FAST_TRANSFER_PART_KB = optional_int_env("FAST_TRANSFER_PART_KB", 512)
+FAST_TRANSFER_MIN_MB = optional_int_env("FAST_TRANSFER_MIN_MB", 20)
+
+# Telegram: part size harus kelipatan 4 KB dan membagi habis 512 KB
+if FAST_TRANSFER_PART_KB <= 0 or FAST_TRANSFER_PART_KB % 4 or 512 % FAST_TRANSFER_PART_KB:
+    raise ValueError("FAST_TRANSFER_PART_KB harus salah satu dari 4, 8, 16, 32, 64, 128, 256, 512.")
+
+FAST_TRANSFER_PART_SIZE = FAST_TRANSFER_PART_KB * 1024
+# Upload selalu 512 KB per part (maksimum server), server menolak lebih dari 4000 part
+UPLOAD_PART_SIZE = 512 * 1024
+UPLOAD_MAX_PARTS = 4000
+# Upload paralel memakai SaveBigFilePart, yang hanya valid untuk file > 10 MB
+BIG_FILE_THRESHOLD = 10 * 1024 * 1024
+FAST_TRANSFER_MIN_SIZE = max(FAST_TRANSFER_MIN_MB * 1024 * 1024, BIG_FILE_THRESHOLD + 1)
+FAST_TRANSFER_LOG_STEP = 10  # log progress setiap 10%
+
+# Duplicate suppression: off | drop | reply
+DEDUP_MODE = os.getenv("DEDUP_MODE", "").strip().lower() or "off"
+if DEDUP_MODE not in ("off", "drop", "reply"):
+    raise ValueError("DEDUP_MODE harus off, drop, atau reply.")
+DEDUP_WINDOW_SECONDS = optional_int_env("DEDUP_WINDOW_MINUTES", 360) * 60
+DEDUP_MAX_ENTRIES = max(optional_int_env("DEDUP_MAX_ENTRIES", 5000), 1)
+# pesan teks tanpa media yang lebih pendek dari ini tidak di-dedup (mis. "ok", "up")
+DEDUP_MIN_TEXT_LENGTH = optional_int_env("DEDUP_MIN_TEXT_LENGTH", 20)
+
+# Interval cek perubahan receivers.json (detik), 0 = nonaktif
+RECEIVERS_RELOAD_INTERVAL = optional_int_env("RECEIVERS_RELOAD_INTERVAL", 5)
 
 DEFAULT_START_DATE = datetime.datetime(2025, 12, 1)
 
 QUEUE_DIR = Path("message_queue")
 DOWNLOAD_DIR = Path("downloads")
+# Limit Telegram dihitung dalam UTF-16 code unit
 CAPTION_LIMIT = 1024
 TEXT_LIMIT = 4096
+# Split di paragraf/baris hanya jika chunk tetap terisi minimal 80% limit
+SPLIT_MIN_FILL = 0.8
 
 QUEUE_DIR.mkdir(exist_ok=True)
 DOWNLOAD_DIR.mkdir(exist_ok=True)
@@ -84,6 +270,7 @@ DOWNLOAD_DIR.mkdir(exist_ok=True)
 LAST_ID_FILE = "last_id.json"
 MESSAGE_MAP_FILE = "message_map.json"
 RECEIVERS_CONFIG_FILE = Path("receivers.json")
+PEER_CACHE_FILE = Path("peer_cache.json")
 
 
 def parse_start_date(raw_value, receiver_name):
@@ -137,6 +324,8 @@ def load_receivers_config():
 
         if not all([name, session, api_id, api_hash, source_channel, target_topic_id]):
             raise ValueError(f"Receiver config tidak lengkap: {entry}")
+        if any(conf["name"] == str(name) for conf in normalized):
+            raise ValueError(f"Nama receiver {name} dipakai lebih dari sekali.")
 
         normalized.append(
             {
@@ -211,6 +400,7 @@ async def send_webhook(payload: dict):
     if not WEBHOOK_ENABLED:
         return
 
+    log_extra = {"event": "webhook", "receiver": payload.get("receiver", {}).get("name")}
     try:
         headers = {"Content-Type": "application/json"}
 
@@ -229,51 +419,491 @@ async def send_webhook(payload: dict):
                 headers=headers
             ) as response:
                 if response.status >= 200 and response.status < 300:
-                    print(f"🌐 WEBHOOK: Success (status {response.status})")
+                    log.info(f"🌐 WEBHOOK: Success (status {response.status})", extra=log_extra)
                 else:
-                    print(f"⚠️ WEBHOOK: Non-success status {response.status}")
+                    log.warning(f"⚠️ WEBHOOK: Non-success status {response.status}", extra=log_extra)
 
     except asyncio.TimeoutError:
-        print("⚠️ WEBHOOK: Timeout - Ignoring")
+        log.warning("⚠️ WEBHOOK: Timeout - Ignoring", extra=log_extra)
     except Exception as e:
-        print(f"⚠️ WEBHOOK: Failed ({type(e).__name__}: {e}) - Ignoring")
+        log.warning(f"⚠️ WEBHOOK: Failed ({type(e).__name__}: {e}) - Ignoring", extra=log_extra)
+
+
+def group_receivers_by_session(configs):
+    """Group receiver configs per session file, checking API credentials are consistent."""
+    sessions = {}
+    for conf in configs:
+        session_name = conf["session"]
+        session_entry = sessions.get(session_name)
+        if not session_entry:
+            session_entry = {
+                "api_id": conf["api_id"],
+                "api_hash": conf["api_hash"],
+                "configs": []
+            }
+            sessions[session_name] = session_entry
+        else:
+            if session_entry["api_id"] != conf["api_id"] or session_entry["api_hash"] != conf["api_hash"]:
+                raise ValueError(
+                    f"Session {session_name} dipakai beberapa API ID/hash. Harus konsisten."
+                )
+        session_entry["configs"].append(conf)
+    return sessions
 
 
 receiver_configs = load_receivers_config()
-receiver_sessions = {}
-
-for conf in receiver_configs:
-    session_name = conf["session"]
-    session_entry = receiver_sessions.get(session_name)
-    if not session_entry:
-        client = TelegramClient(session_name, conf["api_id"], conf["api_hash"])
-        session_entry = {
-            "client": client,
-            "api_id": conf["api_id"],
-            "api_hash": conf["api_hash"],
-            "configs": []
-        }
-        receiver_sessions[session_name] = session_entry
-    else:
-        if session_entry["api_id"] != conf["api_id"] or session_entry["api_hash"] != conf["api_hash"]:
-            raise ValueError(
-                f"Session {session_name} dipakai beberapa API ID/hash. Harus konsisten."
-            )
-    session_entry["configs"].append(conf)
+receiver_sessions = group_receivers_by_session(receiver_configs)
+
+for session_name, session_entry in receiver_sessions.items():
+    session_entry["client"] = TelegramClient(
+        session_name, session_entry["api_id"], session_entry["api_hash"]
+    )
+    session_entry["loop_task"] = None
 
-receiver_client_pairs = [
-    (conf, session_entry["client"])
-    for session_entry in receiver_sessions.values()
-    for conf in session_entry["configs"]
-]
+# routing table: diganti utuh (satu assignment) saat receivers.json di-reload
+receiver_by_name = {conf["name"]: conf for conf in receiver_configs}
+
+# nama source channel per receiver, diisi oleh receiver saat menyimpan queue
+source_channel_names = {}
+
+# receiver name -> (client, handler) dan receiver name -> catch-up task
+receiver_handlers = {}
+receiver_tasks = {}
 
 sender = TelegramClient(SENDER_SESSION, SENDER_API_ID, SENDER_API_HASH)
 
-def split_text(text, limit):
-    """Split text into chunks that respect Telegram limits."""
-    if not text:
+# ---------------------------------------------------------
+# FAST TRANSFER (parallel multi-part download/upload)
+# ---------------------------------------------------------
+def fast_transfer_eligible(size):
+    """Only large files are worth splitting into parallel parts."""
+    return FAST_TRANSFER_ENABLED and bool(size) and size >= FAST_TRANSFER_MIN_SIZE
+
+
+def fast_upload_eligible(size):
+    """Parallel upload also needs the file to fit in UPLOAD_MAX_PARTS parts."""
+    if not fast_transfer_eligible(size):
+        return False
+    return (size + UPLOAD_PART_SIZE - 1) // UPLOAD_PART_SIZE <= UPLOAD_MAX_PARTS
+
+
+def make_progress_logger(label, total_size, receiver_name):
+    """Return a callback that logs transfer progress and throughput every few percent."""
+    started = time.monotonic()
+    state = {"next_pct": FAST_TRANSFER_LOG_STEP}
+    total_mb = total_size / (1024 * 1024)
+
+    def report(done_bytes):
+        pct = done_bytes * 100 // total_size
+        if pct < state["next_pct"] and done_bytes < total_size:
+            return
+        state["next_pct"] = pct - pct % FAST_TRANSFER_LOG_STEP + FAST_TRANSFER_LOG_STEP
+        elapsed = max(time.monotonic() - started, 1e-6)
+        done_mb = done_bytes / (1024 * 1024)
+        log.info(
+            f"📶 {label}: {pct}% ({done_mb:.1f}/{total_mb:.1f} MB, {done_mb / elapsed:.1f} MB/s)",
+            extra={
+                "event": "progress",
+                "receiver": receiver_name,
+                "percent": pct,
+                "bytes": done_bytes,
+                "mb_per_s": round(done_mb / elapsed, 2),
+            }
+        )
+
+    return report
+
+
+async def run_part_workers(part_count, handle_part):
+    """Process part indices 0..part_count-1 with FAST_TRANSFER_WORKERS concurrent workers."""
+    parts = iter(range(part_count))
+
+    async def worker():
+        # iterator dibagi antar worker; next() sinkron jadi aman di satu event loop
+        for part_index in parts:
+            await handle_part(part_index)
+
+    tasks = [
+        asyncio.create_task(worker())
+        for _ in range(min(FAST_TRANSFER_WORKERS, part_count))
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def fast_download_media(msg, receiver_name):
+    """Download a large document by fetching its parts concurrently."""
+    file_info = msg.file
+    size = file_info.size
+    name = file_info.name or f"{msg.id}{file_info.ext or ''}"
+    path = DOWNLOAD_DIR / f"{msg.id}_{name}"
+    part_size = FAST_TRANSFER_PART_SIZE
+    part_count = (size + part_size - 1) // part_size
+    report = make_progress_logger(f"⬇️ [{receiver_name}] {path.name}", size, receiver_name)
+    done = 0
+
+    with open(path, "wb") as fh:
+        fh.truncate(size)
+
+        async def fetch_part(part_index):
+            nonlocal done
+            offset = part_index * part_size
+            async for chunk in msg.client.iter_download(
+                msg.document,
+                offset=offset,
+                limit=1,
+                request_size=part_size,
+                file_size=size
+            ):
+                fh.seek(offset)
+                fh.write(chunk)
+                done += len(chunk)
+                report(done)
+
+        try:
+            await run_part_workers(part_count, fetch_part)
+        except BaseException:
+            fh.close()
+            path.unlink(missing_ok=True)
+            raise
+
+    return str(path)
+
+
+async def fast_upload_file(client, path, receiver_name):
+    """Upload a large file with concurrent SaveBigFilePart requests."""
+    size = os.path.getsize(path)
+    part_size = UPLOAD_PART_SIZE
+    part_count = (size + part_size - 1) // part_size
+    if part_count > UPLOAD_MAX_PARTS:
+        raise ValueError(
+            f"{os.path.basename(path)} butuh {part_count} part, melebihi batas {UPLOAD_MAX_PARTS}."
+        )
+    file_id = random.getrandbits(63)
+    report = make_progress_logger(f"⬆️ [{receiver_name}] {os.path.basename(path)}", size, receiver_name)
+    done = 0
+
+    with open(path, "rb") as fh:
+        async def push_part(part_index):
+            nonlocal done
+            fh.seek(part_index * part_size)
+            chunk = fh.read(part_size)
+            ok = await client(SaveBigFilePartRequest(file_id, part_index, part_count, chunk))
+            if not ok:
+                raise RuntimeError(f"Upload part {part_index}/{part_count} ditolak server.")
+            done += len(chunk)
+            report(done)
+
+        await run_part_workers(part_count, push_part)
+
+    return InputFileBig(file_id, part_count, os.path.basename(path))
+
+
+# ---------------------------------------------------------
+# RESOLVED PEER REGISTRY
+# ---------------------------------------------------------
+# (session_name, peer_id) -> InputPeer, diisi sekali saat startup
+resolved_peers = {}
+
+
+def serialize_input_peer(peer):
+    if isinstance(peer, InputPeerChannel):
+        return {"type": "channel", "id": peer.channel_id, "access_hash": peer.access_hash}
+    if isinstance(peer, InputPeerChat):
+        return {"type": "chat", "id": peer.chat_id}
+    if isinstance(peer, InputPeerUser):
+        return {"type": "user", "id": peer.user_id, "access_hash": peer.access_hash}
+    return None
+
+
+def deserialize_input_peer(raw):
+    if not isinstance(raw, dict):
+        return None
+    try:
+        if raw["type"] == "channel":
+            return InputPeerChannel(int(raw["id"]), int(raw["access_hash"]))
+        if raw["type"] == "chat":
+            return InputPeerChat(int(raw["id"]))
+        if raw["type"] == "user":
+            return InputPeerUser(int(raw["id"]), int(raw["access_hash"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+    return None
+
+
+def load_peer_cache():
+    if PEER_CACHE_FILE.exists():
+        try:
+            data = json.load(open(PEER_CACHE_FILE))
+        except Exception:
+            return {}
+        if isinstance(data, dict):
+            return data
+    return {}
+
+
+def save_peer_cache(data):
+    json.dump(data, open(PEER_CACHE_FILE, "w"), indent=2)
+
+
+async def resolve_peer(client, peer_id, dialogs_loaded):
+    """Resolve peer via session cache, loading dialogs once if the peer is unknown."""
+    try:
+        return await client.get_input_entity(peer_id)
+    except ValueError:
+        if client in dialogs_loaded:
+            raise
+        dialogs_loaded.add(client)
+        await client.get_dialogs()
+        return await client.get_input_entity(peer_id)
+
+
+async def validate_cached_peers(client, peers):
+    """Return ids of cached peers still accessible, using one request per peer kind."""
+    valid = set()
+    channels = {
+        peer_id: peer for peer_id, peer in peers.items() if isinstance(peer, InputPeerChannel)
+    }
+    chats = {
+        peer_id: peer for peer_id, peer in peers.items() if isinstance(peer, InputPeerChat)
+    }
+    # user tidak punya request validasi murah; access hash user jarang berubah
+    valid.update(peer_id for peer_id, peer in peers.items() if isinstance(peer, InputPeerUser))
+
+    if channels:
+        try:
+            result = await client(GetChannelsRequest([
+                InputChannel(peer.channel_id, peer.access_hash) for peer in channels.values()
+            ]))
+            ok_ids = {chat.id for chat in result.chats if isinstance(chat, Channel)}
+            valid.update(peer_id for peer_id, peer in channels.items() if peer.channel_id in ok_ids)
+        except RPCError as e:
+            # satu hash invalid menggagalkan seluruh request: resolve ulang semuanya
+            log.warning(f"⚠️ Validasi cache channel gagal ({e}), resolve ulang")
+
+    if chats:
+        try:
+            result = await client(GetChatsRequest([peer.chat_id for peer in chats.values()]))
+            ok_ids = {
+                chat.id for chat in result.chats
+                if isinstance(chat, Chat) and not chat.deactivated
+            }
+            valid.update(peer_id for peer_id, peer in chats.items() if peer.chat_id in ok_ids)
+        except RPCError as e:
+            log.warning(f"⚠️ Validasi cache grup gagal ({e}), resolve ulang")
+
+    return valid
+
+
+async def build_peer_registry(configs, session_clients):
+    """Resolve every target and source peer up front and persist the access hashes.
+
+    Peers already in the registry are skipped, so reloads only resolve new ones.
+    """
+    wanted = {
+        SENDER_SESSION: (
+            sender,
+            {TARGET_CHANNEL, *(conf["target_channel"] for conf in configs)}
+        )
+    }
+    for conf in configs:
+        session_name = conf["session"]
+        if session_name not in wanted:
+            wanted[session_name] = (session_clients[session_name], set())
+        wanted[session_name][1].add(conf["source_channel"])
+
+    cache = load_peer_cache()
+    dialogs_loaded = set()
+    errors = []
+    resolved_count = 0
+
+    for session_name, (client, peer_ids) in wanted.items():
+        pending = [
+            peer_id for peer_id in sorted(peer_ids)
+            if (session_name, peer_id) not in resolved_peers
+        ]
+        if not pending:
+            continue
+
+        # access hash hanya berlaku untuk akun yang me-resolve-nya
+        me = await client.get_me()
+        account_id = me.id if me else None
+        session_cache = cache.get(session_name)
+        if (
+            not isinstance(session_cache, dict)
+            or session_cache.get("account_id") != account_id
+            or not isinstance(session_cache.get("peers"), dict)
+        ):
+            if session_cache:
+                log.info(f"🔗 Cache peer {session_name} dibuang (akun berubah)")
+            session_cache = {"account_id": account_id, "peers": {}}
+            cache[session_name] = session_cache
+        cached_peers = session_cache["peers"]
+
+        cached = {}
+        for peer_id in pending:
+            peer = deserialize_input_peer(cached_peers.get(str(peer_id)))
+            if peer is not None:
+                cached[peer_id] = peer
+        valid = await validate_cached_peers(client, cached) if cached else set()
+
+        for peer_id in pending:
+            if peer_id in valid:
+                resolved_peers[(session_name, peer_id)] = cached[peer_id]
+                continue
+
+            cached_peers.pop(str(peer_id), None)
+            try:
+                peer = await resolve_peer(client, peer_id, dialogs_loaded)
+            except Exception as e:
+                errors.append(f"{session_name} → {peer_id}: {e}")
+                continue
+            serialized = serialize_input_peer(peer)
+            if serialized:
+                cached_peers[str(peer_id)] = serialized
+            resolved_count += 1
+            resolved_peers[(session_name, peer_id)] = peer
+
+    save_peer_cache(cache)
+
+    if errors:
+        raise ValueError("Gagal resolve peer:\n" + "\n".join(errors))
+
+    log.info(
+        f"🔗 Peer registry siap: {len(resolved_peers)} peer "
+        f"({resolved_count} di-resolve, sisanya dari {PEER_CACHE_FILE} dan tervalidasi)"
+    )
+
+
+def get_input_peer(session_name, peer_id):
+    """Return cached InputPeer, falling back to the raw id if it was never resolved."""
+    return resolved_peers.get((session_name, peer_id), peer_id)
+
+
+async def load_source_channel_names(configs, session_clients):
+    """Fill source_channel_names up front so webhooks for backlog items carry the name."""
+    for conf in configs:
+        if conf["name"] in source_channel_names:
+            continue
+        try:
+            chat = await session_clients[conf["session"]].get_entity(
+                get_input_peer(conf["session"], conf["source_channel"])
+            )
+        except Exception:
+            continue
+        source_channel_names[conf["name"]] = getattr(chat, "title", None) or getattr(chat, "name", None)
+
+
+# ---------------------------------------------------------
+# ENTITY-AWARE TEXT SPLITTING
+# ---------------------------------------------------------
+# Entity yang rusak jika dipotong di tengah (link, mention, kode inline, dst.)
+ATOMIC_ENTITY_TYPES = (
+    MessageEntityBankCard,
+    MessageEntityBotCommand,
+    MessageEntityCashtag,
+    MessageEntityCode,
+    MessageEntityCustomEmoji,
+    MessageEntityEmail,
+    MessageEntityHashtag,
+    MessageEntityMention,
+    MessageEntityMentionName,
+    InputMessageEntityMentionName,
+    MessageEntityPhone,
+    MessageEntityUrl,
+)
+
+# Urutan preferensi titik potong: paragraf, baris, lalu spasi apa saja
+SPLIT_PATTERNS = (re.compile(r"\n[ \t]*\n"), re.compile(r"\n"), re.compile(r"\s"))
+
+
+def cuts_atomic_entity(entities, cut):
+    return any(
+        isinstance(ent, ATOMIC_ENTITY_TYPES) and ent.offset < cut < ent.offset + ent.length
+        for ent in entities
+    )
+
+
+def find_split_point(text, entities, start, stop):
+    """Return the best cut position in (start, stop] of surrogate-encoded text."""
+    min_fill_cut = start + int((stop - start) * SPLIT_MIN_FILL)
+
+    for priority, pattern in enumerate(SPLIT_PATTERNS):
+        # spasi biasa adalah pilihan terakhir, jadi ambil posisi paling jauh tanpa batas fill
+        floor = start if priority == len(SPLIT_PATTERNS) - 1 else min_fill_cut
+        for match in reversed(list(pattern.finditer(text, start, stop))):
+            cut = match.start()
+            if cut <= floor:
+                break
+            if not cuts_atomic_entity(entities, cut):
+                return cut
+
+    # tidak ada whitespace: potong paksa, mundur keluar dari entity atomik/surrogate pair
+    cut = stop
+    for ent in entities:
+        if isinstance(ent, ATOMIC_ENTITY_TYPES) and ent.offset < cut < ent.offset + ent.length:
+            if ent.offset > start:
+                cut = ent.offset
+    if "\ud800" <= text[cut - 1] <= "\udbff":
+        cut -= 1
+    return cut
+
+
+def slice_entities(entities, start, end):
+    """Clip entities to [start, end) and rebase their offsets to start."""
+    sliced = []
+    for ent in entities:
+        ent_start = max(ent.offset, start)
+        ent_end = min(ent.offset + ent.length, end)
+        if ent_end <= ent_start:
+            continue
+        clipped = copy.copy(ent)
+        clipped.offset = ent_start - start
+        clipped.length = ent_end - ent_start
+        sliced.append(clipped)
+    return sliced
+
+
+def split_formatted_text(text, entities, limit, first_limit=None):
+    """Split raw text + formatting entities into as few chunks as Telegram limits allow.
+
+    Limits are measured in UTF-16 code units, like entity offsets. The first chunk
+    may use a different limit (media caption). Returns a list of (text, entities).
+    """
+    if not text or not text.strip():
         return []
-    return [text[i:i + limit] for i in range(0, len(text), limit)]
+
+    text = add_surrogate(text)
+    entities = sorted(entities or [], key=lambda ent: ent.offset)
+    text_len = len(text)
+    chunks = []
+    cur_limit = first_limit or limit
+
+    start = 0
+    while start < text_len and text[start].isspace():
+        start += 1
+
+    while start < text_len:
+        stop = start + cur_limit
+        cut = text_len if stop >= text_len else find_split_point(text, entities, start, stop)
+
+        chunk_end = cut
+        while chunk_end > start and text[chunk_end - 1].isspace():
+            chunk_end -= 1
+        chunks.append((del_surrogate(text[start:chunk_end]), slice_entities(entities, start, chunk_end)))
+
+        start = cut
+        while start < text_len and text[start].isspace():
+            start += 1
+        cur_limit = limit
+
+    return chunks
+
 
 def detect_media_type(msg):
     """Identify media type for better resend behavior."""
@@ -366,61 +996,286 @@ async def resolve_sender_name(msg):
 
     return str(getattr(sender, "id", None)) if getattr(sender, "id", None) else None
 
+# ---------------------------------------------------------
+# DUPLICATE SUPPRESSION (lintas receiver, per target topic)
+# ---------------------------------------------------------
+# (target_channel, target_topic_id) -> OrderedDict fingerprint -> (msg_ts, receiver, msg_id)
+dedup_index = {}
+
+
+def message_fingerprint(msg):
+    """Hash of normalized text plus media id, or None if too weak to compare."""
+    text = " ".join((msg.message or "").casefold().split())
+    media_id = None
+    if msg.photo:
+        media_id = f"photo:{msg.photo.id}"
+    elif msg.document:
+        media_id = f"doc:{msg.document.id}"
+
+    if media_id is None and len(text) < DEDUP_MIN_TEXT_LENGTH:
+        return None
+    return hashlib.blake2b(f"{media_id or ''}\x00{text}".encode("utf-8"), digest_size=16).digest()
+
+
+def check_duplicate(receiver_conf, msg):
+    """Return (receiver, msg_id) of an identical earlier post to the same target topic, or None.
+
+    Unique messages are recorded in the index; the window is measured on message dates.
+    Catch-up and live messages arrive out of date order, so entries are not pruned by
+    date; the index is bounded by DEDUP_MAX_ENTRIES (least recently seen dropped first).
+    """
+    fingerprint = message_fingerprint(msg)
+    if fingerprint is None:
+        return None
+
+    msg_ts = msg.date.timestamp() if msg.date else time.time()
+    entries = dedup_index.setdefault(
+        (receiver_conf["target_channel"], receiver_conf["target_topic_id"]), OrderedDict()
+    )
+
+    seen = entries.get(fingerprint)
+    if seen:
+        seen_ts, seen_receiver, seen_msg_id = seen
+        same_message = (seen_receiver, seen_msg_id) == (receiver_conf["name"], msg.id)
+        if not same_message and abs(msg_ts - seen_ts) <= DEDUP_WINDOW_SECONDS:
+            return seen_receiver, seen_msg_id
+
+    entries[fingerprint] = (msg_ts, receiver_conf["name"], msg.id)
+    entries.move_to_end(fingerprint)
+    while len(entries) > DEDUP_MAX_ENTRIES:
+        entries.popitem(last=False)
+    return None
+
+# ---------------------------------------------------------
+# QUEUE RECORD FORMAT
+# ---------------------------------------------------------
+# Binary layout (little-endian):
+#   version:u8 | msg_id:i64 | reply_to:i64 (0 = none) | 6 x string | entities blob | reply_key
+# string/blob = length:u32 (0xFFFFFFFF = None) + bytes, strings in QueueRecord.STRING_FIELDS
+# order and UTF-8 encoded. Entities blob = MessageEntity TL objects serialized back to back.
+# reply_key = key message_map yang di-reply (untuk reply lintas receiver).
+# Field statis per receiver (target/source channel, topic) tidak disimpan;
+# sender mengambilnya dari receiver_by_name.
+QUEUE_RECORD_VERSION = 1
+QUEUE_CORRUPT_SUFFIX = ".corrupt"
+QUEUE_RECORD_SUFFIX = ".rec"
+QUEUE_RECORD_HEADER = struct.Struct("<Bqq")
+QUEUE_STRING_LEN = struct.Struct("<I")
+QUEUE_NONE_LEN = 0xFFFFFFFF
+
+
+class QueueRecord:
+    """Per-message queue entry, decoded once per queue file."""
+
+    __slots__ = (
+        "msg_id", "reply_to", "receiver", "text", "post_author",
+        "fwd_info", "media_path", "media_type", "entities", "reply_key"
+    )
+
+    STRING_FIELDS = ("receiver", "text", "post_author", "fwd_info", "media_path", "media_type")
+
+    def __init__(self, msg_id, reply_to=None, receiver=None, text=None, post_author=None,
+                 fwd_info=None, media_path=None, media_type=None, entities=None, reply_key=None):
+        self.msg_id = msg_id
+        self.reply_to = reply_to
+        self.receiver = receiver
+        self.text = text
+        self.post_author = post_author
+        self.fwd_info = fwd_info
+        self.media_path = media_path
+        self.media_type = media_type
+        # None = text masih markdown (queue .json lama), list = raw text + entities
+        self.entities = entities
+        # key message_map yang di-reply (menggantikan reply_to), mis. "receiver:123"
+        self.reply_key = reply_key
+
+    def to_bytes(self):
+        parts = [QUEUE_RECORD_HEADER.pack(QUEUE_RECORD_VERSION, self.msg_id, self.reply_to or 0)]
+        values = [getattr(self, field) for field in self.STRING_FIELDS]
+        blobs = [value.encode("utf-8") if value is not None else None for value in values]
+        if self.entities is not None:
+            blobs.append(b"".join(bytes(ent) for ent in self.entities))
+        else:
+            blobs.append(None)
+        blobs.append(self.reply_key.encode("utf-8") if self.reply_key is not None else None)
+
+        for blob in blobs:
+            if blob is None:
+                parts.append(QUEUE_STRING_LEN.pack(QUEUE_NONE_LEN))
+                continue
+            parts.append(QUEUE_STRING_LEN.pack(len(blob)))
+            parts.append(blob)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, raw):
+        version, msg_id, reply_to = QUEUE_RECORD_HEADER.unpack_from(raw, 0)
+        if version != QUEUE_RECORD_VERSION:
+            raise ValueError(f"Versi queue record tidak dikenal: {version}")
+
+        string_count = len(cls.STRING_FIELDS)
+        blobs = []
+        offset = QUEUE_RECORD_HEADER.size
+        for _ in range(string_count + 2):
+            (length,) = QUEUE_STRING_LEN.unpack_from(raw, offset)
+            offset += QUEUE_STRING_LEN.size
+            if length == QUEUE_NONE_LEN:
+                blobs.append(None)
+                continue
+            if offset + length > len(raw):
+                raise ValueError("Queue record terpotong.")
+            blobs.append(raw[offset:offset + length])
+            offset += length
+
+        values = [blob.decode("utf-8") if blob is not None else None for blob in blobs[:string_count]]
+        entities = decode_entities(blobs[string_count])
+        reply_key = blobs[string_count + 1].decode("utf-8") if blobs[string_count + 1] is not None else None
+        return cls(msg_id, reply_to or None, *values, entities=entities, reply_key=reply_key)
+
+    @classmethod
+    def from_legacy_json(cls, data):
+        """Read queue files written before the binary format (receiver__id.json)."""
+        return cls(
+            data["msg_id"],
+            data.get("reply_to"),
+            data.get("receiver", "default"),
+            data.get("text"),
+            data.get("post_author"),
+            data.get("fwd_info"),
+            data.get("media_path"),
+            data.get("media_type")
+        )
+
+
+def decode_entities(blob):
+    if blob is None:
+        return None
+    entities = []
+    with BinaryReader(blob) as reader:
+        while reader.tell_position() < len(blob):
+            entities.append(reader.tgread_object())
+    return entities
+
+
+def read_queue_record(path_obj):
+    if path_obj.suffix == ".json":
+        return QueueRecord.from_legacy_json(json.load(open(path_obj)))
+    return QueueRecord.from_bytes(path_obj.read_bytes())
+
 # ---------------------------------------------------------
 # SAVE MESSAGE TO QUEUE
 # ---------------------------------------------------------
+async def remember_source_channel_name(receiver_name, msg):
+    """Resolve source channel name sekali per receiver (dipakai webhook)."""
+    if receiver_name not in source_channel_names:
+        try:
+            chat = await msg.get_chat()
+            source_channel_names[receiver_name] = (
+                getattr(chat, "title", None) or getattr(chat, "name", None)
+            )
+        except Exception:
+            pass
+    return source_channel_names.get(receiver_name)
+
+
+def queue_file_stem(receiver_name):
+    """Filename-safe receiver name; unsafe names get a hash suffix so they stay unique."""
+    safe = re.sub(r"[^\w.-]", "_", receiver_name)
+    if safe != receiver_name:
+        digest = hashlib.blake2b(receiver_name.encode("utf-8"), digest_size=4).hexdigest()
+        safe = f"{safe}-{digest}"
+    return safe
+
+
+def write_queue_record(record):
+    queue_file = QUEUE_DIR / f"{queue_file_stem(record.receiver)}__{record.msg_id}{QUEUE_RECORD_SUFFIX}"
+    queue_file.write_bytes(record.to_bytes())
+    log.info(
+        f"📥 QUEUE [{record.receiver}]: {queue_file}",
+        extra={"event": "queue", "receiver": record.receiver, "msg_id": record.msg_id}
+    )
+
+
 async def save_to_queue(receiver_conf, msg, local_file=None):
-    reply_to_id = extract_reply_to_id(msg)
-    author_name = await resolve_sender_name(msg)
-    media_type = detect_media_type(msg)
     receiver_name = receiver_conf["name"]
-    target_channel = receiver_conf["target_channel"]
-
-    # Resolve source channel name from chat entity
-    source_channel_name = None
-    try:
-        chat = await msg.get_chat()
-        source_channel_name = getattr(chat, "title", None) or getattr(chat, "name", None)
-    except Exception:
-        pass
-
-    data = {
-        "msg_id": msg.id,
-        "text": msg.text or msg.message,
-        "reply_to": reply_to_id,
-        "post_author": author_name,
-        "fwd_info": None,
-        "media_path": local_file,
-        "media_type": media_type,
-        "receiver": receiver_name,
-        "target_channel_id": target_channel,
-        "target_topic_id": receiver_conf["target_topic_id"],
-        "source_channel_id": receiver_conf["source_channel"],
-        "source_channel_name": source_channel_name,
-        "source_topic_id": receiver_conf.get("source_topic_id")
-    }
+    await remember_source_channel_name(receiver_name, msg)
 
+    fwd_info = None
     if msg.fwd_from:
         if msg.fwd_from.from_name:
-            data["fwd_info"] = msg.fwd_from.from_name
+            fwd_info = msg.fwd_from.from_name
         elif msg.fwd_from.from_id:
-            data["fwd_info"] = str(msg.fwd_from.from_id)
+            fwd_info = str(msg.fwd_from.from_id)
+
+    record = QueueRecord(
+        msg.id,
+        reply_to=extract_reply_to_id(msg),
+        receiver=receiver_name,
+        text=msg.message,
+        post_author=await resolve_sender_name(msg),
+        fwd_info=fwd_info,
+        media_path=local_file,
+        media_type=detect_media_type(msg),
+        entities=list(msg.entities or [])
+    )
+    write_queue_record(record)
+
+
+async def save_duplicate_link(receiver_conf, msg, original):
+    """Queue a short note replying to the already-forwarded original instead of the repost."""
+    receiver_name = receiver_conf["name"]
+    source_name = await remember_source_channel_name(receiver_name, msg) or receiver_name
+    orig_receiver, orig_msg_id = original
 
-    queue_file = QUEUE_DIR / f"{receiver_name}__{msg.id}.json"
-    json.dump(data, open(queue_file, "w"))
-    print(f"📥 QUEUE [{receiver_name}]: {queue_file}")
+    write_queue_record(QueueRecord(
+        msg.id,
+        receiver=receiver_name,
+        text=f"🔁 Juga diposting di: {source_name}",
+        entities=[],
+        reply_key=map_key(orig_receiver, orig_msg_id)
+    ))
 
 # ---------------------------------------------------------
 # RECEIVER: PROCESS MESSAGE (download + queue)
 # ---------------------------------------------------------
 async def process_message(receiver_conf, msg):
+    # pakai config terbaru: reload yang hanya mengubah target tidak me-restart handler/catch-up
+    receiver_conf = receiver_by_name.get(receiver_conf["name"], receiver_conf)
+
+    if DEDUP_MODE != "off":
+        original = check_duplicate(receiver_conf, msg)
+        if original:
+            log.info(
+                f"♊ Duplikat [{receiver_conf['name']}] {msg.id} = {original[0]}:{original[1]} ({DEDUP_MODE})",
+                extra={
+                    "event": "duplicate",
+                    "receiver": receiver_conf["name"],
+                    "msg_id": msg.id,
+                    "original": map_key(*original),
+                }
+            )
+            if DEDUP_MODE == "reply":
+                await save_duplicate_link(receiver_conf, msg, original)
+            save_last_id(receiver_conf["name"], msg.id)
+            return
+
     local_file = None
     if msg.media:
         try:
-            print(f"⬇️ Downloading media [{receiver_conf['name']}]: {msg.id}")
-            local_file = await msg.download_media(DOWNLOAD_DIR)
+            log.info(
+                f"⬇️ Downloading media [{receiver_conf['name']}]: {msg.id}",
+                extra={"event": "download", "receiver": receiver_conf["name"], "msg_id": msg.id}
+            )
+            file_size = msg.file.size if msg.document else None
+            if fast_transfer_eligible(file_size):
+                local_file = await fast_download_media(msg, receiver_conf["name"])
+            else:
+                local_file = await msg.download_media(DOWNLOAD_DIR)
         except Exception as e:
-            print(f"⚠️ Gagal download media {msg.id}: {e}")
+            log.warning(
+                f"⚠️ Gagal download media {msg.id}: {e}",
+                extra={"event": "download", "receiver": receiver_conf["name"], "msg_id": msg.id}
+            )
             local_file = None
 
     await save_to_queue(receiver_conf, msg, local_file)
@@ -431,18 +1286,24 @@ async def process_message(receiver_conf, msg):
 # ---------------------------------------------------------
 async def catch_up_receiver(receiver_conf, client):
     last_id = load_last_id(receiver_conf["name"])
-    entity = await client.get_entity(receiver_conf["source_channel"])
+    entity = get_input_peer(receiver_conf["session"], receiver_conf["source_channel"])
     source_topic_id = receiver_conf["source_topic_id"]
 
     if last_id > 0:
-        print(f"[{receiver_conf['name']}] ⏪ Continue from ID {last_id}")
+        log.info(
+            f"[{receiver_conf['name']}] ⏪ Continue from ID {last_id}",
+            extra={"event": "catch_up", "receiver": receiver_conf["name"]}
+        )
         async for msg in client.iter_messages(entity, min_id=last_id, reverse=True):
             if not message_matches_source_topic(msg, source_topic_id):
                 continue
             await process_message(receiver_conf, msg)
     else:
         start_date = receiver_conf["start_date"]
-        print(f"[{receiver_conf['name']}] 📅 First run since: {start_date}")
+        log.info(
+            f"[{receiver_conf['name']}] 📅 First run since: {start_date}",
+            extra={"event": "catch_up", "receiver": receiver_conf["name"]}
+        )
         async for msg in client.iter_messages(entity, offset_date=start_date, reverse=True):
             if not message_matches_source_topic(msg, source_topic_id):
                 continue
@@ -451,30 +1312,265 @@ async def catch_up_receiver(receiver_conf, client):
 # ---------------------------------------------------------
 # RECEIVER HANDLER (LIVE FORWARD)
 # ---------------------------------------------------------
-for session_entry in receiver_sessions.values():
-    client = session_entry["client"]
-    for rc_conf in session_entry["configs"]:
-        @client.on(events.NewMessage(chats=rc_conf["source_channel"]))
-        async def receiver_handler(event, receiver_conf=rc_conf):
-            if not message_matches_source_topic(event.message, receiver_conf["source_topic_id"]):
-                return
-            await process_message(receiver_conf, event.message)
+def bind_receiver_handler(receiver_conf, client):
+    receiver_name = receiver_conf["name"]
+
+    async def receiver_handler(event):
+        current_conf = receiver_by_name.get(receiver_name)
+        if current_conf is None:
+            return
+        if not message_matches_source_topic(event.message, current_conf["source_topic_id"]):
+            return
+        await process_message(current_conf, event.message)
+
+    client.add_event_handler(receiver_handler, events.NewMessage(chats=receiver_conf["source_channel"]))
+    receiver_handlers[receiver_conf["name"]] = (client, receiver_handler)
+
+
+def unbind_receiver_handler(receiver_name):
+    entry = receiver_handlers.pop(receiver_name, None)
+    if entry:
+        client, handler = entry
+        client.remove_event_handler(handler)
+
+
+def log_task_result(task):
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc:
+        log.error(f"❌ Task {task.get_name()} berhenti karena error: {exc}", exc_info=exc)
+
+
+def start_catch_up(receiver_conf, client):
+    task = asyncio.create_task(
+        catch_up_receiver(receiver_conf, client),
+        name=f"catch_up:{receiver_conf['name']}"
+    )
+    task.add_done_callback(log_task_result)
+    receiver_tasks[receiver_conf["name"]] = task
+
+
+def stop_catch_up(receiver_name):
+    task = receiver_tasks.pop(receiver_name, None)
+    if task and not task.done():
+        task.cancel()
+
+
+def start_session_loop(session_name, session_entry):
+    task = asyncio.create_task(
+        session_entry["client"].run_until_disconnected(),
+        name=f"session:{session_name}"
+    )
+    task.add_done_callback(log_task_result)
+    session_entry["loop_task"] = task
+
+# ---------------------------------------------------------
+# RECEIVERS.JSON HOT RELOAD
+# ---------------------------------------------------------
+def receivers_config_mtime():
+    try:
+        return RECEIVERS_CONFIG_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def source_side_changed(old_conf, new_conf):
+    """True if the change needs a new handler/catch-up, not just a new route."""
+    return any(
+        old_conf[key] != new_conf[key]
+        for key in ("session", "source_channel", "source_topic_id", "start_date")
+    )
+
+
+async def apply_receivers_config(new_configs):
+    """Diff new receivers.json against the running config and restart only what changed."""
+    global receiver_configs, receiver_by_name
+
+    new_sessions = group_receivers_by_session(new_configs)
+    new_by_name = {conf["name"]: conf for conf in new_configs}
+    old_by_name = receiver_by_name
+
+    removed = [name for name in old_by_name if name not in new_by_name]
+    added = [name for name in new_by_name if name not in old_by_name]
+    changed = [
+        name for name in new_by_name
+        if name in old_by_name and new_by_name[name] != old_by_name[name]
+    ]
+    if not (removed or added or changed):
+        return
+
+    for session_name, new_entry in new_sessions.items():
+        running = receiver_sessions.get(session_name)
+        if running and (running["api_id"], running["api_hash"]) != (new_entry["api_id"], new_entry["api_hash"]):
+            raise ValueError(
+                f"API ID/hash session {session_name} berubah; restart proses untuk menerapkannya."
+            )
+
+    # 1. Siapkan session baru (harus sudah login, tidak boleh minta OTP saat reload)
+    started_sessions = {}
+    try:
+        for session_name, new_entry in new_sessions.items():
+            if session_name in receiver_sessions:
+                continue
+            client = TelegramClient(session_name, new_entry["api_id"], new_entry["api_hash"])
+            started_sessions[session_name] = client
+            await client.connect()
+            if not await client.is_user_authorized():
+                raise ValueError(
+                    f"Session {session_name} belum login; jalankan login sekali lalu simpan ulang receivers.json."
+                )
+
+        # 2. Resolve peer receiver baru/berubah sebelum mengubah apa pun
+        session_clients = {
+            name: entry["client"] for name, entry in receiver_sessions.items()
+        }
+        session_clients.update(started_sessions)
+        await build_peer_registry(
+            [new_by_name[name] for name in added + changed],
+            session_clients
+        )
+    except BaseException:
+        for client in started_sessions.values():
+            await client.disconnect()
+        raise
+
+    # 3. Commit: hentikan receiver yang hilang/berubah sumbernya
+    restart = [
+        name for name in changed
+        if source_side_changed(old_by_name[name], new_by_name[name])
+    ]
+    for name in removed + restart:
+        unbind_receiver_handler(name)
+        stop_catch_up(name)
+        source_channel_names.pop(name, None)
+
+    for session_name in [name for name in receiver_sessions if name not in new_sessions]:
+        session_entry = receiver_sessions.pop(session_name)
+        await session_entry["client"].disconnect()
+        log.info(f"🔌 Session {session_name} dihentikan (tidak dipakai lagi)", extra={"event": "reload"})
+
+    for session_name, client in started_sessions.items():
+        receiver_sessions[session_name] = {
+            "client": client,
+            "api_id": new_sessions[session_name]["api_id"],
+            "api_hash": new_sessions[session_name]["api_hash"],
+            "loop_task": None
+        }
+        start_session_loop(session_name, receiver_sessions[session_name])
+        log.info(f"🔌 Session {session_name} dimulai", extra={"event": "reload"})
+
+    for session_name, new_entry in new_sessions.items():
+        receiver_sessions[session_name]["configs"] = new_entry["configs"]
+
+    # routing table diganti atomik; sender membaca receiver_by_name per item
+    receiver_configs = new_configs
+    receiver_by_name = new_by_name
+
+    await load_source_channel_names(
+        [new_by_name[name] for name in added + restart],
+        {name: entry["client"] for name, entry in receiver_sessions.items()}
+    )
+
+    for name in added + restart:
+        conf = new_by_name[name]
+        client = receiver_sessions[conf["session"]]["client"]
+        bind_receiver_handler(conf, client)
+        start_catch_up(conf, client)
+
+    log.info(
+        f"♻️ receivers.json reloaded: +{len(added)} -{len(removed)} "
+        f"~{len(changed)} ({len(restart)} restart)",
+        extra={"event": "reload"}
+    )
+
+
+async def watch_receivers_config():
+    if RECEIVERS_RELOAD_INTERVAL <= 0:
+        return
+
+    last_mtime = receivers_config_mtime()
+    while True:
+        await asyncio.sleep(RECEIVERS_RELOAD_INTERVAL)
+        mtime = receivers_config_mtime()
+        if mtime is None or mtime == last_mtime:
+            continue
+        last_mtime = mtime
+
+        try:
+            new_configs = load_receivers_config()
+            await apply_receivers_config(new_configs)
+        except Exception as e:
+            log.warning(
+                f"⚠️ Reload receivers.json gagal, config lama tetap dipakai: {e}",
+                extra={"event": "reload"}
+            )
 
 # ---------------------------------------------------------
 # SENDER: SEND FROM QUEUE
 # ---------------------------------------------------------
+# Warning untuk queue receiver yang tidak dikenal dibatasi 1x per interval (detik)
+ORPHAN_WARN_INTERVAL = 300
+orphan_warned_at = {}
+
+
+USER_LINK_PATTERN = re.compile(r"^tg://user\?id=(\d+)$")
+
+
+async def resolve_mention_entities(client, entities):
+    """Turn user mentions into InputMessageEntityMentionName for client.
+
+    Entities are passed raw via formatting_entities, which skips Telethon's own
+    mention conversion; the server rejects MessageEntityMentionName and tg://user
+    links. Mentions of users client cannot resolve are dropped (text stays).
+    """
+    resolved = []
+    for ent in entities or []:
+        user_id = None
+        if isinstance(ent, MessageEntityMentionName):
+            user_id = ent.user_id
+        elif isinstance(ent, MessageEntityTextUrl):
+            match = USER_LINK_PATTERN.match(ent.url or "")
+            if match:
+                user_id = int(match.group(1))
+
+        if user_id is None:
+            resolved.append(ent)
+            continue
+
+        try:
+            input_user = utils.get_input_user(await client.get_input_entity(user_id))
+        except (ValueError, TypeError):
+            continue
+        resolved.append(InputMessageEntityMentionName(ent.offset, ent.length, input_user))
+    return resolved
+
+
+def discard_queue_file(path_obj, record=None):
+    """Remove a queue file together with its downloaded media, if any."""
+    if record is not None and record.media_path and os.path.exists(record.media_path):
+        try:
+            os.remove(record.media_path)
+        except OSError as err:
+            log.warning(f"⚠️ Gagal hapus media {record.media_path}: {err}", extra={"event": "media_deleted"})
+    os.remove(path_obj)
+
+
 async def send_from_queue():
-    print("🚀 Sender started")
+    log.info("🚀 Sender started")
     message_map = load_message_map()
 
     while True:
-        queue_files = list(QUEUE_DIR.glob("*.json"))
+        queue_files = [
+            path_obj for path_obj in QUEUE_DIR.iterdir()
+            if path_obj.suffix in (QUEUE_RECORD_SUFFIX, ".json")
+        ]
 
         if not queue_files:
             await asyncio.sleep(2)
             continue
 
-        # urutkan berdasarkan numeric msg_id dari nama file (receiver__1234.json)
+        # urutkan berdasarkan numeric msg_id dari nama file (receiver__1234.rec)
         def queue_sort_key(path_obj):
             stem = path_obj.stem.rsplit("__", 1)[-1]
             try:
@@ -483,94 +1579,147 @@ async def send_from_queue():
                 return (1, path_obj.stat().st_mtime)
 
         queue_files = sorted(queue_files, key=queue_sort_key)
+        # kalau semua file cuma ditahan (receiver tidak dikenal), tunggu dulu sebelum scan ulang
+        progressed = False
 
         for q in queue_files:
             try:
-                data = json.load(open(q))
+                record = read_queue_record(q)
             except Exception as e:
-                print(f"⚠️ Gagal baca queue file {q}: {e}")
-                os.remove(q)
+                # media_path tidak bisa dibaca dari record rusak: simpan file untuk dicek manual
+                corrupt_path = q.with_suffix(QUEUE_CORRUPT_SUFFIX)
+                log.warning(
+                    f"⚠️ Gagal baca queue file {q}: {e}. Dipindah ke {corrupt_path}; "
+                    f"media terkait di {DOWNLOAD_DIR}/ mungkin perlu dihapus manual.",
+                    extra={"event": "queue"}
+                )
+                os.replace(q, corrupt_path)
+                progressed = True
                 continue
 
-            msg_id = data["msg_id"]
-            receiver_name = data.get("receiver", "default")
-            reply_to = None
-            topic_id = data.get("target_topic_id")
-            target_channel_id = data.get("target_channel_id", TARGET_CHANNEL)
-
-            try:
-                topic_id = int(topic_id) if topic_id is not None else None
-            except (TypeError, ValueError):
-                topic_id = None
+            msg_id = record.msg_id
+            receiver_name = record.receiver
+            receiver_conf = receiver_by_name.get(receiver_name)
+            if receiver_conf is None:
+                # simpan sampai receiver kembali ada (rename/hapus sementara di receivers.json)
+                now = time.monotonic()
+                if now - orphan_warned_at.get(receiver_name, -ORPHAN_WARN_INTERVAL) >= ORPHAN_WARN_INTERVAL:
+                    orphan_warned_at[receiver_name] = now
+                    log.warning(
+                        f"⚠️ Receiver {receiver_name} tidak ada di {RECEIVERS_CONFIG_FILE}, "
+                        f"queue-nya ditahan sampai receiver ditambahkan lagi.",
+                        extra={"event": "queue", "receiver": receiver_name, "msg_id": msg_id}
+                    )
+                continue
 
-            try:
-                target_channel_id = int(target_channel_id)
-            except (TypeError, ValueError):
-                target_channel_id = TARGET_CHANNEL
+            reply_to = None
+            topic_id = receiver_conf["target_topic_id"]
+            target_channel_id = receiver_conf["target_channel"]
+            target_peer = get_input_peer(SENDER_SESSION, target_channel_id)
 
             # map reply id
-            if data["reply_to"]:
-                orig = map_key(receiver_name, data["reply_to"])
+            if record.reply_key:
+                reply_to = message_map.get(record.reply_key)
+                if not reply_to:
+                    # catatan duplikat hanya berguna sebagai reply: tunggu original terkirim
+                    if time.time() - q.stat().st_mtime < DEDUP_WINDOW_SECONDS:
+                        continue
+                    log.warning(
+                        f"⚠️ Original {record.reply_key} tidak terkirim dalam window dedup, "
+                        f"catatan duplikat {q.name} dibuang.",
+                        extra={"event": "duplicate", "receiver": receiver_name, "msg_id": msg_id}
+                    )
+                    discard_queue_file(q, record)
+                    progressed = True
+                    continue
+            elif record.reply_to:
+                orig = map_key(receiver_name, record.reply_to)
                 reply_to = message_map.get(orig)
                 if not reply_to:
-                    reply_to = message_map.get(str(data["reply_to"]))
+                    reply_to = message_map.get(str(record.reply_to))
 
             base_reply_target = reply_to or topic_id
             if base_reply_target is None:
-                print(f"⚠️ Queue {q.name} tidak memiliki topic_id, pesan akan dikirim tanpa topic.")
-
-            # prepare final text
-            author = f"\n\n✍️ : {data['post_author']}" if data["post_author"] else ""
-            forwarded = f"\n🔁 Diteruskan dari: {data['fwd_info']}" if data["fwd_info"] else ""
-            caption = ((data["text"] or "") + author + forwarded).rstrip("\n")
+                log.warning(
+                    f"⚠️ Queue {q.name} tidak memiliki topic_id, pesan akan dikirim tanpa topic.",
+                    extra={"event": "queue", "receiver": receiver_name, "msg_id": msg_id}
+                )
+
+            # prepare final text (raw text + entities; record lama masih markdown)
+            if record.entities is None:
+                body_text, body_entities = markdown.parse(record.text or "")
+            else:
+                body_text, body_entities = record.text or "", record.entities
+            author = f"\n\n✍️ : {record.post_author}" if record.post_author else ""
+            forwarded = f"\n🔁 Diteruskan dari: {record.fwd_info}" if record.fwd_info else ""
+            caption = (body_text + author + forwarded).rstrip("\n")
 
             try:
+                send_entities = await resolve_mention_entities(sender, body_entities)
                 primary_sent = None
                 last_sent = None
 
                 # send media or text
-                if data["media_path"]:
-                    media_type = data.get("media_type")
+                if record.media_path:
+                    media_type = record.media_type
                     is_photo = media_type == "photo"
                     is_video = media_type == "video"
                     force_document = not (is_photo or is_video)
 
-                    caption_chunks = split_text(caption, CAPTION_LIMIT)
-                    media_caption = caption_chunks[0] if caption_chunks else ""
+                    caption_chunks = split_formatted_text(
+                        caption, send_entities, TEXT_LIMIT, first_limit=CAPTION_LIMIT
+                    )
+                    media_caption, media_entities = caption_chunks[0] if caption_chunks else ("", [])
+
+                    media_file = record.media_path
+                    media_attributes = None
+                    if (
+                        not is_photo
+                        and os.path.exists(media_file)
+                        and fast_upload_eligible(os.path.getsize(media_file))
+                    ):
+                        # atribut (durasi/resolusi video) dibaca dari file lokal sebelum
+                        # diganti handle InputFileBig yang tidak punya path
+                        media_attributes, _ = utils.get_attributes(
+                            media_file,
+                            force_document=force_document,
+                            supports_streaming=is_video
+                        )
+                        media_file = await fast_upload_file(sender, media_file, receiver_name)
 
                     sent = await sender.send_file(
-                        target_channel_id,
-                        data["media_path"],
+                        target_peer,
+                        media_file,
                         caption=media_caption,
+                        formatting_entities=media_entities,
                         reply_to=base_reply_target,
                         force_document=force_document,
-                        supports_streaming=is_video
+                        supports_streaming=is_video,
+                        attributes=media_attributes
                     )
                     primary_sent = sent
                     last_sent = sent
 
-                    remaining_text = caption[len(media_caption):] if caption else ""
-                    if remaining_text.strip():
-                        for chunk in split_text(remaining_text, TEXT_LIMIT):
-                            sent_extra = await sender.send_message(
-                                target_channel_id,
-                                chunk,
-                                reply_to=primary_sent.id,
-                                link_preview=True
-                            )
-                            last_sent = sent_extra
+                    for chunk, chunk_entities in caption_chunks[1:]:
+                        sent_extra = await sender.send_message(
+                            target_peer,
+                            chunk,
+                            formatting_entities=chunk_entities,
+                            reply_to=primary_sent.id,
+                            link_preview=True
+                        )
+                        last_sent = sent_extra
                 else:
-                    text_body = caption if caption.strip() else ""
-                    if not text_body:
-                        text_body = f"[Pesan kosong/tidak didukung - ID {msg_id}]"
+                    text_chunks = split_formatted_text(caption, send_entities, TEXT_LIMIT)
+                    if not text_chunks:
+                        text_chunks = [(f"[Pesan kosong/tidak didukung - ID {msg_id}]", [])]
 
-                    text_chunks = split_text(text_body, TEXT_LIMIT) or [text_body]
-
-                    for idx, chunk in enumerate(text_chunks):
+                    for idx, (chunk, chunk_entities) in enumerate(text_chunks):
                         current_reply = base_reply_target if idx == 0 else primary_sent.id
                         sent_msg = await sender.send_message(
-                            target_channel_id,
+                            target_peer,
                             chunk,
+                            formatting_entities=chunk_entities,
                             reply_to=current_reply,
                             link_preview=True
                         )
@@ -584,7 +1733,15 @@ async def send_from_queue():
                 message_map[map_key(receiver_name, msg_id)] = primary_sent.id
                 save_message_map(message_map)
 
-                print(f"✅ SENT [{receiver_name}]: {msg_id} → {last_sent.id}")
+                log.info(
+                    f"✅ SENT [{receiver_name}]: {msg_id} → {last_sent.id}",
+                    extra={
+                        "event": "sent",
+                        "receiver": receiver_name,
+                        "msg_id": msg_id,
+                        "target_msg_id": primary_sent.id,
+                    }
+                )
 
                 # Send webhook notification (fire & forget)
                 if WEBHOOK_ENABLED:
@@ -592,10 +1749,10 @@ async def send_from_queue():
                         "event_type": "message_forwarded",
                         "timestamp": datetime.datetime.now().astimezone().isoformat(),
                         "source": {
-                            "channel_id": data.get("source_channel_id"),
-                            "channel_name": data.get("source_channel_name"),
+                            "channel_id": receiver_conf["source_channel"],
+                            "channel_name": source_channel_names.get(receiver_name),
                             "message_id": msg_id,
-                            "topic_id": data.get("source_topic_id")
+                            "topic_id": receiver_conf["source_topic_id"]
                         },
                         "destination": {
                             "channel_id": target_channel_id,
@@ -603,11 +1760,11 @@ async def send_from_queue():
                             "topic_id": topic_id
                         },
                         "message": {
-                            "text": data.get("text") or "",
-                            "author": data.get("post_author"),
-                            "forwarded_from": data.get("fwd_info"),
-                            "has_media": bool(data.get("media_path")),
-                            "media_type": data.get("media_type")
+                            "text": markdown.unparse(body_text, body_entities),
+                            "author": record.post_author,
+                            "forwarded_from": record.fwd_info,
+                            "has_media": bool(record.media_path),
+                            "media_type": record.media_type
                         },
                         "receiver": {
                             "name": receiver_name
@@ -617,55 +1774,71 @@ async def send_from_queue():
                     asyncio.create_task(send_webhook(webhook_payload))
 
                 # remove local media after successful send
-                if data.get("media_path") and os.path.exists(data["media_path"]):
+                if record.media_path and os.path.exists(record.media_path):
                     try:
-                        os.remove(data["media_path"])
-                        print(f"🧹 Deleted media: {data['media_path']}")
+                        os.remove(record.media_path)
+                        log.info(
+                            f"🧹 Deleted media: {record.media_path}",
+                            extra={"event": "media_deleted", "receiver": receiver_name, "msg_id": msg_id}
+                        )
                     except OSError as err:
-                        print(f"⚠️ Gagal hapus media {data['media_path']}: {err}")
+                        log.warning(
+                            f"⚠️ Gagal hapus media {record.media_path}: {err}",
+                            extra={"event": "media_deleted", "receiver": receiver_name, "msg_id": msg_id}
+                        )
             except Exception as e:
                 if isinstance(e, FloodWaitError):
                     wait_time = max(int(getattr(e, "seconds", 5)) + 1, 5)
-                    print(f"⏳ Flood wait {wait_time}s untuk pesan {msg_id}: {e}")
+                    log.warning(
+                        f"⏳ Flood wait {wait_time}s untuk pesan {msg_id}: {e}",
+                        extra={"event": "flood_wait", "receiver": receiver_name, "msg_id": msg_id}
+                    )
                     await asyncio.sleep(wait_time)
                     continue
 
-                print(f"❌ Gagal kirim pesan [{receiver_name}] {msg_id}: {e}")
+                log.error(
+                    f"❌ Gagal kirim pesan [{receiver_name}] {msg_id}: {e}",
+                    extra={"event": "send_failed", "receiver": receiver_name, "msg_id": msg_id}
+                )
                 # kalau error, jangan hapus file dulu, biar bisa coba lagi nanti
                 await asyncio.sleep(2)
                 continue
 
             # kalau sukses kirim → hapus queue
             os.remove(q)
+            progressed = True
+
+        if not progressed:
+            await asyncio.sleep(2)
 
 # ---------------------------------------------------------
 # MAIN: RUN BOTH SESSION IN PARALLEL
 # ---------------------------------------------------------
 async def main():
-    if not receiver_client_pairs:
+    if not receiver_configs:
         raise ValueError("Minimal harus ada 1 receiver di receivers.json.")
 
     for session_entry in receiver_sessions.values():
+        for rc_conf in session_entry["configs"]:
+            bind_receiver_handler(rc_conf, session_entry["client"])
         await session_entry["client"].start()
 
     await sender.start()
 
-    catch_up_tasks = [
-        asyncio.create_task(catch_up_receiver(rc_conf, rc_client))
-        for rc_conf, rc_client in receiver_client_pairs
-    ]
+    session_clients = {name: entry["client"] for name, entry in receiver_sessions.items()}
+    await build_peer_registry(receiver_configs, session_clients)
+    await load_source_channel_names(receiver_configs, session_clients)
 
-    receiver_loop_tasks = [
-        asyncio.create_task(session_entry["client"].run_until_disconnected())
-        for session_entry in receiver_sessions.values()
-    ]
+    for session_name, session_entry in receiver_sessions.items():
+        for rc_conf in session_entry["configs"]:
+            start_catch_up(rc_conf, session_entry["client"])
+        start_session_loop(session_name, session_entry)
 
-    print("🚀 All sessions running...")
+    log.info("🚀 All sessions running...")
 
     await asyncio.gather(
         send_from_queue(),
-        *catch_up_tasks,
-        *receiver_loop_tasks
+        watch_receivers_config()
     )
 
 